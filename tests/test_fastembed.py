@@ -1,8 +1,13 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator
+
 import pytest
 
 from qdrant_client import QdrantClient, models
+from qdrant_client.fastembed_common import FastEmbedMisc
 
-from tests.utils import read_version
+from tests.utils import TESTS_PATH, read_version
 
 
 DOCS_EXAMPLE = {
@@ -14,9 +19,87 @@ DOCS_EXAMPLE = {
     "ids": [42, 2000],
 }
 
-
-def test_dense():
-    local_client = QdrantClient(":memory:")
+QDRANT_VERSION = read_version()
+
+FASTEMBED_CACHE_PATH = os.getenv("FASTEMBED_CACHE_PATH", str(TESTS_PATH / ".fastembed_cache"))
+
+DENSE_MODELS = (QdrantClient.DEFAULT_EMBEDDING_MODEL, "sentence-transformers/all-MiniLM-L6-v2")
+SPARSE_MODELS = (
+    "prithivida/Splade_PP_en_v1",
+    "Qdrant/bm25",
+    "Qdrant/bm42-all-minilm-l6-v2-attentions",
+)
+
+
+@pytest.fixture(scope="session")
+def fastembed_client() -> Generator[QdrantClient, None, None]:
+    # a single client for the whole session, so fastembed models are loaded once and reused by all the tests
+    client = QdrantClient(":memory:")
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def fastembed_models(fastembed_client: QdrantClient) -> None:
+    if not fastembed_client._FASTEMBED_INSTALLED:
+        return
+
+    # download and load all the models used in this module in parallel, instead of one by one in each test
+    with ThreadPoolExecutor(max_workers=len(DENSE_MODELS) + len(SPARSE_MODELS)) as executor:
+        futures = [
+            executor.submit(
+                fastembed_client._get_or_init_model,
+                model_name=model_name,
+                cache_dir=FASTEMBED_CACHE_PATH,
+                deprecated=True,
+            )
+            for model_name in DENSE_MODELS
+        ] + [
+            executor.submit(
+                fastembed_client._get_or_init_sparse_model,
+                model_name=model_name,
+                cache_dir=FASTEMBED_CACHE_PATH,
+                deprecated=True,
+            )
+            for model_name in SPARSE_MODELS
+        ]
+        for future in futures:
+            future.result()
+
+
+@pytest.fixture(scope="module")
+def cached_model_descriptions() -> Generator[None, None, None]:
+    # model descriptions are rebuilt from fastembed registries on each call, build them once for the module instead
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for method_name in (
+            "list_text_models",
+            "list_image_models",
+            "list_late_interaction_text_models",
+            "list_late_interaction_multimodal_models",
+            "list_sparse_models",
+        ):
+            descriptions = getattr(FastEmbedMisc, method_name)()
+            monkeypatch.setattr(
+                FastEmbedMisc, method_name, classmethod(lambda cls, d=descriptions: d)
+            )
+        yield
+
+
+@pytest.fixture
+def local_client(fastembed_client: QdrantClient) -> Generator[QdrantClient, None, None]:
+    yield fastembed_client
+
+    for collection in fastembed_client.get_collections().collections:
+        fastembed_client.delete_collection(collection.name)
+
+    # drop model selection, but keep already initialized models in the embedder cache
+    fastembed_client.set_sparse_model(None)
+    # there is no public way to reset the dense model to the default one
+    fastembed_client._embedding_model_name = None
+
+
+@pytest.mark.usefixtures("fastembed_models")
+def test_dense(local_client: QdrantClient):
     collection_name = "demo_collection"
     docs = [
         "Qdrant has Langchain integrations",
@@ -27,14 +110,25 @@ def test_dense():
         with pytest.raises(ImportError):
             local_client.add(collection_name, docs)
     else:
-        local_client.add(collection_name=collection_name, documents=docs)
+        # ids are generated by `add`
+        example_ids = local_client.add(
+            collection_name=collection_name,
+            documents=DOCS_EXAMPLE["documents"],
+            metadata=DOCS_EXAMPLE["metadata"],
+        )
+        assert len(set(example_ids)) == 2
         assert local_client.count(collection_name).count == 2
 
-        local_client.add(collection_name=collection_name, **DOCS_EXAMPLE)
+        # add to an already existing collection, without metadata
+        ids = local_client.add(collection_name=collection_name, documents=docs)
+        assert len(set(example_ids + ids)) == 4
         assert local_client.count(collection_name).count == 4
 
-        id_ = DOCS_EXAMPLE["ids"][0]
-        record = local_client.retrieve(collection_name, ids=[id_])[0]
+        records = local_client.retrieve(collection_name, ids=ids)
+        assert sorted(record.payload["document"] for record in records) == sorted(docs)
+        assert all(len(record.payload) == 1 for record in records)
+
+        record = local_client.retrieve(collection_name, ids=[example_ids[0]])[0]
         assert record.payload == {
             "document": DOCS_EXAMPLE["documents"][0],
             **DOCS_EXAMPLE["metadata"][0],
@@ -47,14 +141,15 @@ def test_dense():
         assert len(search_result) > 0
 
 
-def test_hybrid_query():
-    local_client = QdrantClient(":memory:")
+@pytest.mark.usefixtures("fastembed_models")
+def test_hybrid_query(local_client: QdrantClient):
     collection_name = "hybrid_collection"
 
     if not local_client._FASTEMBED_INSTALLED:
         pytest.skip("FastEmbed is not installed, skipping test")
 
-    local_client.set_sparse_model(embedding_model_name="prithivida/Splade_PP_en_v1")
+    sparse_model_name = "prithivida/Splade_PP_en_v1"
+    local_client.set_sparse_model(embedding_model_name=sparse_model_name)
 
     local_client.add(collection_name=collection_name, **DOCS_EXAMPLE)
 
@@ -74,10 +169,19 @@ def test_hybrid_query():
         hybrid_search_result[0].score != dense_search_result[0].score
     )  # hybrid search has score from fusion
 
+    # switching sparse model off and on again should bring hybrid search back
+    local_client.set_sparse_model(embedding_model_name=sparse_model_name)
+    assert local_client.sparse_embedding_model_name == sparse_model_name
 
-def test_query_batch():
-    local_client = QdrantClient(":memory:")
+    toggled_search_result = local_client.query(
+        collection_name=collection_name, query_text="This is a query document"
+    )
+    assert len(toggled_search_result) > 0
+    assert toggled_search_result[0].score == hybrid_search_result[0].score
 
+
+@pytest.mark.usefixtures("fastembed_models")
+def test_query_batch(local_client: QdrantClient):
     dense_collection_name = "dense_collection"
     hybrid_collection_name = "hybrid_collection"
 
@@ -111,8 +215,8 @@ def test_query_batch():
     )  # hybrid search has score from fusion
 
 
-def test_set_model():
-    local_client = QdrantClient(":memory:")
+@pytest.mark.usefixtures("fastembed_models")
+def test_set_model(local_client: QdrantClient):
     collection_name = "demo_collection"
     embedding_model_name = "sentence-transformers/all-MiniLM-L6-v2"
     if not local_client._FASTEMBED_INSTALLED:
@@ -131,13 +235,12 @@ def test_set_model():
     assert local_client.count(collection_name).count == 2
 
 
-def test_idf_models():
-    local_client = QdrantClient(":memory:")
-
+@pytest.mark.usefixtures("fastembed_models")
+def test_idf_models(local_client: QdrantClient):
     if not local_client._FASTEMBED_INSTALLED:
         pytest.skip("FastEmbed is not installed, skipping")
 
-    major, minor, patch, dev = read_version()
+    major, minor, patch, dev = QDRANT_VERSION
     if not dev and None not in (major, minor, patch) and (major, minor, patch) < (1, 10, 2):
         pytest.skip("Works as of version 1.10.2")
 
@@ -159,19 +262,29 @@ def test_idf_models():
     # models work
 
 
-def test_get_embedding_size():
-    local_client = QdrantClient(":memory:")
-
+@pytest.mark.usefixtures("cached_model_descriptions")
+@pytest.mark.parametrize(
+    "model_name, embedding_size",
+    [
+        (None, 384),
+        ("BAAI/bge-base-en-v1.5", 768),
+        ("Qdrant/resnet50-onnx", 2048),
+        ("colbert-ir/colbertv2.0", 128),
+    ],
+)
+def test_get_embedding_size(
+    local_client: QdrantClient, model_name: str | None, embedding_size: int
+):
     if not local_client._FASTEMBED_INSTALLED:
         pytest.skip("FastEmbed is not installed, skipping test")
 
-    assert local_client.get_embedding_size() == 384
+    assert local_client.get_embedding_size(model_name=model_name) == embedding_size
 
-    assert local_client.get_embedding_size(model_name="BAAI/bge-base-en-v1.5") == 768
 
-    assert local_client.get_embedding_size(model_name="Qdrant/resnet50-onnx") == 2048
-
-    assert local_client.get_embedding_size(model_name="colbert-ir/colbertv2.0") == 128
+@pytest.mark.usefixtures("cached_model_descriptions")
+def test_get_embedding_size_sparse(local_client: QdrantClient):
+    if not local_client._FASTEMBED_INSTALLED:
+        pytest.skip("FastEmbed is not installed, skipping test")
 
     with pytest.raises(
         ValueError, match="Sparse embeddings do not return fixed embedding size and distance type"